@@ -1,12 +1,11 @@
+import io
+import tarfile
+import time
 from aiida.common import CalcInfo, CodeInfo
-from aiida.plugins import DataFactory
-from aiida_phonopy.common.raw_parsers import (get_BORN_txt,
+from aiida.orm import Dict, StructureData, ArrayData
+from aiida_phonopy.common.raw_parsers import (get_BORN_lines,
                                               get_phonopy_conf_file_txt,
-                                              get_poscar_txt)
-
-Dict = DataFactory('dict')
-StructureData = DataFactory('structure')
-ArrayData = DataFactory('array')
+                                              get_poscar_lines)
 
 
 class BasePhonopyCalculation(object):
@@ -18,6 +17,8 @@ class BasePhonopyCalculation(object):
     _INPUT_CELL = 'POSCAR'
     _INPUT_FORCE_SETS = 'FORCE_SETS'
     _INPUT_NAC = 'BORN'
+    _INPUT_ARCHIVE = 'inputs.tar.gz'
+    _WRITE_BUFFER_SIZE = 1 << 20
 
     @classmethod
     def _baseclass_use_methods(cls, spec):
@@ -35,10 +36,41 @@ class BasePhonopyCalculation(object):
         spec.input('primitive', valid_type=StructureData,
                    required=False, help=('Use a node for the structure'))
         spec.input('metadata.options.withmpi', valid_type=bool, default=False)
+        spec.input('metadata.options.pack_input_files',
+                   valid_type=bool, default=False,
+                   help=('Pack the phonopy input, POSCAR and BORN files '
+                         'into a single gzipped tar archive that is '
+                         'extracted on the remote before running'))
+
+    def _write_input_files(self, folder, files):
+        for filename, lines in files:
+            with open(folder.get_abs_path(filename), 'w',
+                      buffering=self._WRITE_BUFFER_SIZE) as infile:
+                infile.writelines(lines)
+
+    def _write_input_archive(self, folder, files):
+        mtime = time.time()
+        with tarfile.open(folder.get_abs_path(self._INPUT_ARCHIVE),
+                          'w:gz') as archive:
+            for filename, lines in files:
+                data = "".join(lines).encode()
+                info = tarfile.TarInfo(name=filename)
+                info.size = len(data)
+                info.mtime = mtime
+                archive.addfile(info, io.BytesIO(data))
 
     def _create_additional_files(self, folder):
         pass
 
+    @staticmethod
+    def _make_codeinfo(code, cmdline_params, stdout_name):
+        codeinfo = CodeInfo()
+        codeinfo.cmdline_params = cmdline_params
+        codeinfo.code_uuid = code.uuid
+        codeinfo.stdout_name = stdout_name
+        codeinfo.withmpi = False
+        return codeinfo
+
     def prepare_for_submission(self, folder):
         """Create the input files from the input nodes passed to this instance of the `CalcJob`.
 
@@ -55,6 +87,8 @@ class BasePhonopyCalculation(object):
         settings = self.inputs.settings
         structure = self.inputs.structure
         code = self.inputs.code
+        input_filename = self.inputs.metadata.options.input_filename
+        output_filename = self.inputs.metadata.options.output_filename
 
         ##############################
         # END OF INITIAL INPUT CHECK #
@@ -64,31 +98,28 @@ class BasePhonopyCalculation(object):
 
         self._create_additional_files(folder)
 
-        cell_txt = get_poscar_txt(structure)
+        cell_lines = get_poscar_lines(structure)
         input_txt = get_phonopy_conf_file_txt(settings)
 
-        input_filename = folder.get_abs_path(
-            self.inputs.metadata.options.input_filename)
-        with open(input_filename, 'w') as infile:
-            infile.write(input_txt)
-
-        cell_filename = folder.get_abs_path(self._INPUT_CELL)
-        with open(cell_filename, 'w') as infile:
-            infile.write(cell_txt)
+        files = [(input_filename, [input_txt]),
+                 (self._INPUT_CELL, cell_lines)]
 
         if ('nac_params' in self.inputs and
             'primitive' in self.inputs):
-            born_txt = get_BORN_txt(
+            born_lines = get_BORN_lines(
                 self.inputs.nac_params,
                 self.inputs.primitive,
                 settings['symmetry_tolerance'])
-
-            nac_filename = folder.get_abs_path(self._INPUT_NAC)
-            with open(nac_filename, 'w') as infile:
-                infile.write(born_txt)
+            files.append((self._INPUT_NAC, born_lines))
             for params in self._additional_cmd_params:
                 params.append('--nac')
 
+        pack_input_files = self.inputs.metadata.options.pack_input_files
+        if pack_input_files:
+            self._write_input_archive(folder, files)
+        else:
+            self._write_input_files(folder, files)
+
         # ============================ calcinfo ===============================
 
         local_copy_list = []
@@ -105,16 +136,15 @@ class BasePhonopyCalculation(object):
         # Retrieve files
         calcinfo.retrieve_list = self._internal_retrieve_list
 
-        calcinfo.codes_info = []
-        for default_params, additional_params in zip(
-                self._calculation_cmd, self._additional_cmd_params):
-            codeinfo = CodeInfo()
-            codeinfo.cmdline_params = (
-                [self.inputs.metadata.options.input_filename, ]
-                + default_params + additional_params)
-            codeinfo.code_uuid = code.uuid
-            codeinfo.stdout_name = self.inputs.metadata.options.output_filename
-            codeinfo.withmpi = False
-            calcinfo.codes_info.append(codeinfo)
+        if pack_input_files:
+            calcinfo.prepend_text = "tar xzf %s" % self._INPUT_ARCHIVE
+
+        calcinfo.codes_info = [
+            self._make_codeinfo(
+                code,
+                [input_filename, ] + default_params + additional_params,
+                output_filename)
+            for default_params, additional_params in zip(
+                self._calculation_cmd, self._additional_cmd_params)]
 
         return calcinfo
@@ -1,18 +1,11 @@
-from aiida.plugins import DataFactory
 from aiida_phonopy.calcs.base import BasePhonopyCalculation
 from aiida.engine import CalcJob, ExitCode
-from aiida.orm import Str
+from aiida.orm import Str, BandsData, ArrayData, XyData
 from aiida.common import InputValidationError
 from aiida_phonopy.common.raw_parsers import get_FORCE_SETS_txt
 import six
 
 
-BandsData = DataFactory('array.bands')
-ArrayData = DataFactory('array')
-XyData = DataFactory('array.xy')
-Dict = DataFactory('dict')
-
-
 class PhonopyCalculation(BasePhonopyCalculation, CalcJob):
     """
     A basic plugin for calculating phonon properties using Phonopy.
@@ -9,6 +9,22 @@ StructureData = DataFactory('structure')
 
 def get_calcjob_builder(structure, calculator_settings, calc_type=None,
                         pressure=0.0, label=None):
+    return get_calcjob_builders([structure, ],
+                                calculator_settings,
+                                calc_type=calc_type,
+                                pressure=pressure,
+                                labels=[label, ])[0]
+
+
+def get_calcjob_builders(structures, calculator_settings, calc_type=None,
+                         pressure=0.0, labels=None):
+    """Returns builders of the same calculator for a list of structures
+
+    The code and the calculator settings are looked up only once and
+    shared by all builders.
+
+    """
+
     if calc_type:
         code = Code.get_from_string(
             calculator_settings[calc_type]['code_string'])
@@ -16,16 +32,21 @@ def get_calcjob_builder(structure, calculator_settings, calc_type=None,
         code = Code.get_from_string(
             calculator_settings['code_string'])
 
+    if labels is None:
+        labels = [None, ] * len(structures)
+
     if code.attributes['input_plugin'] in ['vasp.vasp']:
         if calc_type is None:
             settings_dict = calculator_settings.get_dict()
         else:
             settings_dict = calculator_settings[calc_type]
 
-        return _get_vasp_builder(structure,
-                                 settings_dict,
-                                 pressure=pressure,
-                                 label=label)
+        return [_get_vasp_builder(structure,
+                                  settings_dict,
+                                  pressure=pressure,
+                                  label=label,
+                                  code=code)
+                for structure, label in zip(structures, labels)]
     else:
         raise RuntimeError("Code could not be found.")
 
@@ -62,22 +83,25 @@ def get_immigrant_builder(calculation_folder,
     return builder
 
 
-def _get_vasp_builder(structure, settings_dict, pressure=0.0, label=None):
+def _get_vasp_builder(structure, settings_dict, pressure=0.0, label=None,
+                      code=None):
     """
     Generate the input paramemeters needed to run a calculation for VASP
 
     :param structure:  StructureData object containing the crystal structure
     :param settings:  dict object containing a dictionary with the
         INCAR parameters
+    :param code: Code of VASP. Looked up from settings if not given.
     :return: Calculation process object, input dictionary
     """
 
-    code_string = settings_dict['code_string']
+    if code is None:
+        code = Code.get_from_string(settings_dict['code_string'])
     VaspWorkflow = WorkflowFactory('vasp.vasp')
     builder = VaspWorkflow.get_builder()
     if label:
         builder.metadata.label = label
-    builder.code = Code.get_from_string(code_string)
+    builder.code = code
     builder.structure = structure
     options = Dict(dict=settings_dict['options'])
     builder.options = options
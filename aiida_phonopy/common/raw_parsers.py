@@ -135,15 +135,25 @@ def get_BORN_txt(nac_data, structure, symmetry_tolerance):
         Symmetry tolerance.
     """
 
-    from phonopy.file_IO import get_BORN_lines
+    return "".join(get_BORN_lines(nac_data, structure, symmetry_tolerance))
+
+
+def get_BORN_lines(nac_data, structure, symmetry_tolerance):
+    """Yields newline-terminated lines of BORN file one by one.
+
+    Parameters are the same as those of get_BORN_txt.
+    """
+
+    from phonopy.file_IO import get_BORN_lines as get_phonopy_BORN_lines
 
     born_charges = nac_data.get_array('born_charges')
     epsilon = nac_data.get_array('epsilon')
     pcell = phonopy_atoms_from_structure(structure)
-    lines = get_BORN_lines(pcell, born_charges, epsilon,
-                           symprec=symmetry_tolerance)
+    lines = get_phonopy_BORN_lines(pcell, born_charges, epsilon,
+                                   symprec=symmetry_tolerance)
 
-    return "\n".join(lines)
+    for line in lines:
+        yield line + "\n"
 
 
 def get_FORCE_SETS_txt(force_sets, displacements_dataset):
@@ -166,6 +176,10 @@ def get_FORCE_CONSTANTS_txt(force_constants_object):
 
 
 def get_poscar_txt(structure, use_direct=True):
+    return "".join(get_poscar_lines(structure, use_direct=use_direct))
+
+
+def get_poscar_lines(structure, use_direct=True):
     types = [site.kind_name for site in structure.sites]
     atom_type_unique = np.unique(types, return_index=True)
     sort_index = np.argsort(atom_type_unique[1])
@@ -173,25 +187,27 @@ def get_poscar_txt(structure, use_direct=True):
     elements_count = np.diff(np.append(
         np.array(atom_type_unique[1])[sort_index], [len(types)]))
 
-    poscar_txt = '# VASP POSCAR generated using aiida workflow '
-    poscar_txt += '\n1.0\n'
+    lines = ['# VASP POSCAR generated using aiida workflow \n', '1.0\n']
     cell = structure.cell
     for row in cell:
-        poscar_txt += '{0: 22.16f} {1: 22.16f} {2: 22.16f}\n'.format(*row)
-    poscar_txt += ' '.join([str(e) for e in elements]) + '\n'
-    poscar_txt += ' '.join([str(e) for e in elements_count]) + '\n'
+        lines.append('{0: 22.16f} {1: 22.16f} {2: 22.16f}\n'.format(*row))
+    lines.append(' '.join([str(e) for e in elements]) + '\n')
+    lines.append(' '.join([str(e) for e in elements_count]) + '\n')
     if use_direct:
-        poscar_txt += 'Direct\n'
+        lines.append('Direct\n')
     else:
-        poscar_txt += 'Cartesian\n'
-    for site in structure.sites:
-        if use_direct:
-            coordinates = np.dot(site.position, np.linalg.inv(cell))
-        else:
-            coordinates = site.position
-        poscar_txt += '{0: 22.16f} {1: 22.16f} {2: 22.16f}\n'.format(*coordinates)
+        lines.append('Cartesian\n')
+    positions = np.array([site.position for site in structure.sites],
+                         dtype='double').reshape(-1, 3)
+    if use_direct:
+        coordinates = np.dot(positions, np.linalg.inv(cell))
+    else:
+        coordinates = positions
+    # Format all coordinates in a single % operation instead of per site.
+    lines.append(('% 22.16f % 22.16f % 22.16f\n' * len(coordinates))
+                 % tuple(coordinates.ravel()))
 
-    return poscar_txt
+    return lines
 
 
 def get_phonopy_conf_file_txt(parameters_object, bands=None):
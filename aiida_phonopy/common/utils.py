@@ -95,6 +95,25 @@ def check_imported_supercell_structure(supercell_ref,
 
 @calcfunction
 def get_force_sets(**forces_dict):
+    return _get_force_sets(forces_dict)
+
+
+@calcfunction
+def get_force_sets_and_fcs(structure, phonon_settings, **forces_dict):
+    """Build force sets and force constants in one calcfunction
+
+    This is equivalent to get_force_sets followed by get_force_constants,
+    but the force sets are not passed around as a separate input.
+
+    """
+
+    force_sets = _get_force_sets(forces_dict)
+    force_constants = _get_force_constants(
+        structure, phonon_settings, force_sets.get_array('force_sets'))
+    return {'force_sets': force_sets, 'force_constants': force_constants}
+
+
+def _get_force_sets(forces_dict):
     forces = []
     energies = []
     for i in range(len(forces_dict)):
@@ -157,10 +176,23 @@ def get_nac_params(born_charges, epsilon, nac_structure, **params):
 
 @calcfunction
 def get_force_constants(structure, phonon_settings, force_sets):
+    """Produce force constants from a force sets node
+
+    Not used by PhonopyWorkChain, which calls get_force_sets_and_fcs, but
+    kept as public API.
+
+    """
+
+    return _get_force_constants(structure,
+                                phonon_settings,
+                                force_sets.get_array('force_sets'))
+
+
+def _get_force_constants(structure, phonon_settings, forces):
     params = {}
     phonon = get_phonopy_instance(structure, phonon_settings, params)
     phonon.dataset = phonon_settings['displacement_dataset']
-    phonon.forces = force_sets.get_array('force_sets')
+    phonon.forces = forces
     phonon.produce_force_constants()
     force_constants = DataFactory('array')()
     force_constants.set_array('force_constants', phonon.force_constants)
@@ -1,11 +1,12 @@
 from aiida.engine import WorkChain
-from aiida.plugins import DataFactory
-from aiida.orm import Float, Bool, Str, Code
+from aiida.orm import (Float, Bool, Str, Code, Dict, ArrayData, XyData,
+                       StructureData, BandsData)
 from aiida.engine import if_
 from aiida_phonopy.common.generate_inputs import (get_calcjob_builder,
+                                                  get_calcjob_builders,
                                                   get_immigrant_builder)
 from aiida_phonopy.common.utils import (
-    get_force_sets, get_force_constants, get_nac_params, get_phonon,
+    get_force_sets, get_force_sets_and_fcs, get_nac_params, get_phonon,
     get_phonon_setting_info, check_imported_supercell_structure,
     from_node_id_to_aiida_node_id, get_data_from_node_id)
 
@@ -13,12 +14,6 @@ from aiida_phonopy.common.utils import (
 # Should be improved by some kind of WorkChainFactory
 # For now all workchains should be copied to aiida/workflows
 
-Dict = DataFactory('dict')
-ArrayData = DataFactory('array')
-XyData = DataFactory('array.xy')
-StructureData = DataFactory('structure')
-BandsData = DataFactory('array.bands')
-
 
 class PhonopyWorkChain(WorkChain):
     """ Workchain to do a phonon calculation using phonopy
@@ -58,9 +53,10 @@ class PhonopyWorkChain(WorkChain):
     code_string : Str, optional
         Code string of phonopy needed when both of run_phonopy and
         remote_phonopy are True.
-    options : Dict
+    options : dict
         AiiDa calculation options for phonon calculation used when both of
-        run_phonopy and remote_phonopy are True.
+        run_phonopy and remote_phonopy are True. This is a non_db input, i.e.,
+        it is not stored in the database.
     symmetry_tolerance : Float, optional
         Symmetry tolerance. Default is 1e-5.
     immigrant_calculation_folders : Dict, optional
@@ -86,7 +82,7 @@ class PhonopyWorkChain(WorkChain):
                    valid_type=Dict, required=False)
         spec.input('calculator_settings', valid_type=Dict, required=False)
         spec.input('code_string', valid_type=Str, required=False)
-        spec.input('options', valid_type=Dict, required=False)
+        spec.input('options', valid_type=dict, required=False, non_db=True)
         spec.input('symmetry_tolerance',
                    valid_type=Float, required=False, default=Float(1e-5))
         spec.input('dry_run',
@@ -119,7 +115,6 @@ class PhonopyWorkChain(WorkChain):
                         cls.run_phonopy_remote,
                         cls.collect_data,
                     ).else_(
-                        cls.create_force_constants,
                         cls.run_phonopy_in_workchain,
                     )
                 )
@@ -146,10 +141,7 @@ class PhonopyWorkChain(WorkChain):
         return self.inputs.run_phonopy
 
     def is_nac(self):
-        if 'is_nac' in self.inputs.phonon_settings.attributes:
-            return self.inputs.phonon_settings['is_nac']
-        else:
-            False
+        return self.inputs.phonon_settings.get_attribute('is_nac', False)
 
     def import_calculations_from_files(self):
         return 'immigrant_calculation_folders' in self.inputs
@@ -193,10 +185,11 @@ class PhonopyWorkChain(WorkChain):
         self.ctx.phonon_setting_info = return_vals['phonon_setting_info']
         self.out('phonon_setting_info', self.ctx.phonon_setting_info)
 
-        self.ctx.supercells = {}
-        for i in range(len(return_vals) - 3):
-            label = "supercell_%03d" % (i + 1)
-            self.ctx.supercells[label] = return_vals[label]
+        # Labels are kept as a list to fix the order of displacements.
+        self.ctx.labels = ["supercell_%03d" % (i + 1)
+                           for i in range(len(return_vals) - 3)]
+        self.ctx.supercells = {label: return_vals[label]
+                               for label in self.ctx.labels}
         self.ctx.primitive = return_vals['primitive']
         self.ctx.supercell = return_vals['supercell']
         self.out('primitive', self.ctx.primitive)
@@ -206,18 +199,21 @@ class PhonopyWorkChain(WorkChain):
         self.report('run force calculations')
 
         # Forces
-        for i in range(len(self.ctx.supercells)):
-            label = "supercell_%03d" % (i + 1)
-            builder = get_calcjob_builder(self.ctx.supercells[label],
-                                          self.inputs.calculator_settings,
-                                          calc_type='forces',
-                                          label=label)
+        # get_calcjob_builders resolves the code and calculator settings
+        # only once for all supercells.
+        labels = self.ctx.labels
+        builders = get_calcjob_builders(
+            [self.ctx.supercells[label] for label in labels],
+            self.inputs.calculator_settings,
+            calc_type='forces',
+            labels=labels)
+        for label, builder in zip(labels, builders):
             future = self.submit(builder)
             self.report('{} pk = {}'.format(label, future.pk))
             self.to_context(**{label: future})
 
         # Born charges and dielectric constant
-        if self.ctx.phonon_setting_info['is_nac']:
+        if self.is_nac():
             self.report('calculate born charges and dielectric constant')
             builder = get_calcjob_builder(self.ctx.primitive,
                                           self.inputs.calculator_settings,
@@ -231,8 +227,13 @@ class PhonopyWorkChain(WorkChain):
         self.report('import calculation data in files')
 
         calc_folders_Dict = self.inputs.immigrant_calculation_folders
-        for i, force_folder in enumerate(calc_folders_Dict['force']):
-            label = "supercell_%03d" % (i + 1)
+        force_folders = calc_folders_Dict['force']
+        if len(force_folders) != len(self.ctx.labels):
+            raise RuntimeError(
+                "Number of force calculation folders (%d) is different "
+                "from that of supercells (%d)."
+                % (len(force_folders), len(self.ctx.labels)))
+        for label, force_folder in zip(self.ctx.labels, force_folders):
             builder = get_immigrant_builder(force_folder,
                                             self.inputs.calculator_settings,
                                             calc_type='forces')
@@ -241,7 +242,7 @@ class PhonopyWorkChain(WorkChain):
             self.report('{} pk = {}'.format(label, future.pk))
             self.to_context(**{label: future})
 
-        if self.ctx.phonon_setting_info['is_nac']:  # NAC the last one
+        if self.is_nac():  # NAC the last one
             label = 'born_and_epsilon'
             builder = get_immigrant_builder(calc_folders_Dict['nac'][0],
                                             self.inputs.calculator_settings,
@@ -256,13 +257,18 @@ class PhonopyWorkChain(WorkChain):
 
         calc_nodes_Dict = self.inputs.calculation_nodes
 
-        for i, node_id in enumerate(calc_nodes_Dict['force']):
-            label = "supercell_%03d" % (i + 1)
+        force_node_ids = calc_nodes_Dict['force']
+        if len(force_node_ids) != len(self.ctx.labels):
+            raise RuntimeError(
+                "Number of force calculation nodes (%d) is different "
+                "from that of supercells (%d)."
+                % (len(force_node_ids), len(self.ctx.labels)))
+        for label, node_id in zip(self.ctx.labels, force_node_ids):
             aiida_node_id = from_node_id_to_aiida_node_id(node_id)
             # self.ctx[label]['forces'] -> ArrayData()('final')
             self.ctx[label] = get_data_from_node_id(aiida_node_id)
 
-        if self.ctx.phonon_setting_info['is_nac']:  # NAC the last one
+        if self.is_nac():  # NAC the last one
             label = 'born_and_epsilon'
             node_id = calc_nodes_Dict['nac'][0]
             aiida_node_id = from_node_id_to_aiida_node_id(node_id)
@@ -276,13 +282,11 @@ class PhonopyWorkChain(WorkChain):
         msg = ("Immigrant failed because of inconsistency of supercell"
                "structure")
 
-        for i in range(len(self.ctx.supercells)):
-            label = "supercell_%03d" % (i + 1)
+        # Data imported from nodes are dicts of nodes, otherwise calculations
+        from_nodes = self.import_calculations_from_nodes()
+        for label in self.ctx.labels:
             calc = self.ctx[label]
-            if type(calc) is dict:
-                calc_dict = calc
-            else:
-                calc_dict = calc.inputs
+            calc_dict = calc if from_nodes else calc.inputs
             supercell_ref = self.ctx.supercells[label]
             supercell_calc = calc_dict['structure']
             if not check_imported_supercell_structure(
@@ -295,24 +299,28 @@ class PhonopyWorkChain(WorkChain):
         self.report('Finish here because of dry-run setting')
 
     def create_force_sets(self):
-        """Build datasets from forces of supercells with displacments"""
+        """Build datasets from forces of supercells with displacments
+
+        When phonopy runs in the workchain, force constants are also
+        created here by calling get_force_sets_and_fcs.
+
+        """
 
         self.report('create force sets')
 
         # VASP specific
         forces_dict = {}
+        n_forces = 0
 
-        for i in range(len(self.ctx.supercells)):
-            label = "supercell_%03d" % (i + 1)
+        # Data imported from nodes are dicts of nodes, otherwise calculations
+        from_nodes = self.import_calculations_from_nodes()
+        for i, label in enumerate(self.ctx.labels):
             calc = self.ctx[label]
-            if type(calc) is dict:
-                calc_dict = calc
-            else:
-                calc_dict = calc.outputs
+            calc_dict = calc if from_nodes else calc.outputs
             if ('forces' in calc_dict and
                 'final' in calc_dict['forces'].get_arraynames()):
-                label = "forces_%03d" % (i + 1)
-                forces_dict[label] = calc_dict['forces']
+                forces_dict["forces_%03d" % (i + 1)] = calc_dict['forces']
+                n_forces += 1
             else:
                 msg = ("Forces could not be found in calculation %03d."
                        % (i + 1))
@@ -320,14 +328,23 @@ class PhonopyWorkChain(WorkChain):
 
             if ('misc' in calc_dict and
                 'total_energies' in calc_dict['misc'].keys()):
-                label = "misc_%03d" % (i + 1)
-                forces_dict[label] = calc_dict['misc']
+                forces_dict["misc_%03d" % (i + 1)] = calc_dict['misc']
 
-        if sum(['forces' in k for k in forces_dict]) != len(self.ctx.supercells):
+        if n_forces != len(self.ctx.supercells):
             raise RuntimeError("Forces could not be retrieved.")
 
-        self.ctx.force_sets = get_force_sets(**forces_dict)
-        self.out('force_sets', self.ctx.force_sets)
+        if self.inputs.run_phonopy and not self.inputs.remote_phonopy:
+            return_vals = get_force_sets_and_fcs(
+                self.inputs.structure,
+                self.ctx.phonon_setting_info,
+                **forces_dict)
+            self.ctx.force_sets = return_vals['force_sets']
+            self.ctx.force_constants = return_vals['force_constants']
+            self.out('force_sets', self.ctx.force_sets)
+            self.out('force_constants', self.ctx.force_constants)
+        else:
+            self.ctx.force_sets = get_force_sets(**forces_dict)
+            self.out('force_sets', self.ctx.force_sets)
 
     def create_nac_params(self):
         self.report('create nac data')
@@ -335,7 +352,7 @@ class PhonopyWorkChain(WorkChain):
         # VASP specific
         # Call workfunction to make links
         calc = self.ctx.born_and_epsilon
-        if type(calc) is dict:
+        if self.import_calculations_from_nodes():
             calc_dict = calc
             structure = calc['structure']
         else:
@@ -351,8 +368,7 @@ class PhonopyWorkChain(WorkChain):
                 "Dielectric constant could not be found "
                 "in the calculation. Please check the calculation setting.")
 
-        params = {'symmetry_tolerance':
-                  Float(self.ctx.phonon_setting_info['symmetry_tolerance'])}
+        params = {'symmetry_tolerance': self.inputs.symmetry_tolerance}
         if self.import_calculations():
             params['primitive'] = self.ctx.primitive
         self.ctx.nac_params = get_nac_params(
@@ -396,15 +412,6 @@ class PhonopyWorkChain(WorkChain):
 
         self.report('finish phonon')
 
-    def create_force_constants(self):
-        self.report('create force constants')
-
-        self.ctx.force_constants = get_force_constants(
-            self.inputs.structure,
-            self.ctx.phonon_setting_info,
-            self.ctx.force_sets)
-        self.out('force_constants', self.ctx.force_constants)
-
     def run_phonopy_in_workchain(self):
         self.report('phonopy calculation in workchain')
 
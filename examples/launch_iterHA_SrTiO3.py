@@ -95,7 +95,7 @@ Direct
               'is_nac': True,
               'fc_calculator': 'alm'})
     builder.symmetry_tolerance = Float(1e-5)
-    builder.options = Dict(dict=base_config['options'])
+    builder.options = base_config['options']
     builder.metadata.label = "SrTiO3 iterative phonon 2x2x2 1000K"
     builder.metadata.description = "SrTiO3 iterative phonon 2x2x2 1000K"
     builder.max_iteration = Int(40)
@@ -90,7 +90,7 @@ Direct
               'distance': 0.01,
               'is_nac': True})
     builder.symmetry_tolerance = Float(1e-5)
-    builder.options = Dict(dict=base_config['options'])
+    builder.options = base_config['options']
     builder.metadata.label = "NaCl 2x2x2 phonon test on stern"
     builder.metadata.description = "NaCl 2x2x2 phonon test on stern"
 